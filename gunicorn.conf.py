@@ -14,7 +14,13 @@ backlog = 2048
 
 # Worker processes
 workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
-worker_class = "sync"
+# Padrão sync: o auto_save_manager guarda a sessão ativa no processo, então só
+# um request por processo garante que cada salvamento caia na própria sessão.
+# Workers com threads (GUNICORN_WORKER_CLASS=gthread + GUNICORN_THREADS) são
+# opcionais e só devem ser usados quando todos os salvamentos informarem session_id
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'sync')
+# Mais de uma thread faz o gunicorn trocar sync por gthread
+threads = int(os.getenv('GUNICORN_THREADS', 1))
 worker_connections = 1000
 timeout = 60
 keepalive = 2
@@ -6,11 +6,17 @@ Rotas aprimoradas com agentes psicológicos especializados
 """
 
 import os
+import gzip
 import logging
 import time
 import json
+import secrets
+import threading
+from collections import deque
 from datetime import datetime
-from flask import Blueprint, request, jsonify
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional
+from flask import Blueprint, request, Response
 from services.archaeological_master import archaeological_master
 from services.visceral_master_agent import visceral_master
 from services.visual_proofs_director import visual_proofs_director
@@ -22,59 +28,305 @@ from services.enhanced_ui_manager import enhanced_ui_manager
 from database import db_manager
 from routes.progress import get_progress_tracker, update_analysis_progress
 from services.auto_save_manager import auto_save_manager, salvar_etapa, salvar_erro
+from services.analysis_result_cache import analysis_result_cache
+from utils.time_utils import now_iso
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
 
 logger = logging.getLogger(__name__)
 
 # Cria blueprint
 enhanced_analysis_bp = Blueprint('enhanced_analysis', __name__)
 
+# Compressão das respostas JSON (análises completas são texto altamente repetitivo)
+RESPONSE_COMPRESS_MIN_SIZE = 2048
+RESPONSE_COMPRESS_LEVEL = 6
+
+# Persistência no banco fora do caminho da resposta
+_DB_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix='enhanced_analysis_db')
+
+# Limites de entrada da análise arqueológica
+MAX_ANALYSIS_REQUEST_BYTES = int(os.getenv('MAX_ANALYSIS_REQUEST_BYTES', 1024 * 1024))
+ANALYSIS_TEXT_FIELDS_MAX_LENGTH = {
+    'segmento': 200,
+    'produto': 200,
+    'publico': 500,
+    'prazo_lancamento': 100,
+    'concorrentes': 2000,
+    'dados_adicionais': 10000,
+    'query': 500,
+    'session_id': 100
+}
+ANALYSIS_NUMERIC_FIELDS = ('preco', 'objetivo_receita', 'orcamento_marketing')
+
+# Token bucket por IP para o endpoint de análise completa. Opcional: só é ativado
+# com ANALYSIS_RATE_LIMIT_PER_MINUTE definido, pois usa remote_addr (atrás de proxy
+# todos os clientes compartilhariam um bucket) e cada worker mantém seus próprios buckets
+ANALYSIS_RATE_LIMIT_BURST = int(os.getenv('ANALYSIS_RATE_LIMIT_BURST', 5))
+ANALYSIS_RATE_LIMIT_PER_MINUTE = float(os.getenv('ANALYSIS_RATE_LIMIT_PER_MINUTE') or 0)
+_rate_limit_buckets = {}
+_rate_limit_lock = threading.Lock()
+
+# Eventos de progresso em memória por sessão, servidos via SSE. Ficam na memória
+# do worker que executa a análise: o stream só é encontrado com um único worker
+# (GUNICORN_WORKERS=1) ou roteamento fixo por sessão (sticky) no proxy
+PROGRESS_STREAM_MAX_EVENTS = 256
+PROGRESS_STREAM_RETENTION_SECONDS = 300
+PROGRESS_STREAM_KEEPALIVE_SECONDS = 15
+_progress_streams = {}
+
+class _ProgressStream:
+    """Buffer circular de eventos de progresso de uma sessão"""
+    
+    def __init__(self):
+        self.events = deque(maxlen=PROGRESS_STREAM_MAX_EVENTS)
+        self.total = 0
+        self.done = False
+        self._changed = threading.Condition()
+    
+    def append(self, event: Dict[str, Any]):
+        with self._changed:
+            self.events.append(event)
+            self.total += 1
+            self._changed.notify_all()
+    
+    def finish(self):
+        """Marca o stream como concluído e acorda os clientes em espera"""
+        with self._changed:
+            self.done = True
+            self._changed.notify_all()
+    
+    def wait_events(self, sent: int, timeout: float):
+        """Aguarda novos eventos e retorna (eventos não enviados, novo total enviado, concluído)"""
+        with self._changed:
+            self._changed.wait_for(lambda: self.total != sent or self.done, timeout)
+            pending = min(self.total - sent, len(self.events))
+            events = list(self.events)[-pending:] if pending > 0 else []
+            return events, self.total, self.done
+
+def _discard_progress_stream(session_id: str, progress_stream: _ProgressStream):
+    """Remove o stream da sessão, a menos que já tenha sido substituído por outro"""
+    if _progress_streams.get(session_id) is progress_stream:
+        _progress_streams.pop(session_id, None)
+
+def _dumps(payload: Any) -> bytes:
+    """Serializa payload para bytes JSON com orjson (fallback para json da stdlib)"""
+    if HAS_ORJSON:
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, ensure_ascii=False, default=str).encode('utf-8')
+
+def _json_response(body: bytes, status: int = 200, gzipped_body: Optional[bytes] = None) -> Response:
+    """Cria resposta JSON a partir de bytes, comprimindo com gzip quando vantajoso"""
+    response = Response(body, status=status, mimetype='application/json')
+    response.vary.add('Accept-Encoding')
+    
+    # Qualidade 0 (gzip;q=0) significa que o cliente recusa gzip
+    if len(body) >= RESPONSE_COMPRESS_MIN_SIZE and request.accept_encodings['gzip'] > 0:
+        if gzipped_body is None:
+            gzipped_body = gzip.compress(body, compresslevel=RESPONSE_COMPRESS_LEVEL)
+        response.set_data(gzipped_body)
+        response.headers['Content-Encoding'] = 'gzip'
+    
+    return response
+
+def ojson(payload: Any, status: int = 200) -> Response:
+    """Cria resposta JSON a partir do payload"""
+    return _json_response(_dumps(payload), status)
+
+def _read_limited_body(max_bytes: int) -> Optional[bytes]:
+    """Lê no máximo max_bytes do corpo da requisição; None se o corpo for maior"""
+    
+    # Lê do stream em vez de confiar no Content-Length (ausente em envios chunked)
+    chunks = []
+    remaining = max_bytes + 1
+    while remaining > 0:
+        chunk = request.stream.read(min(remaining, 64 * 1024))
+        if not chunk:
+            break
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    
+    if remaining <= 0:
+        return None
+    return b''.join(chunks)
+
+def _load_json_body(raw: Optional[bytes] = None) -> Any:
+    """Decodifica o corpo JSON da requisição sem manter os bytes em cache (ValueError se inválido)"""
+    if raw is None:
+        raw = request.get_data(cache=False)
+    if not raw:
+        return None
+    if HAS_ORJSON:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+def _invalid_json_response() -> Response:
+    """Resposta padrão para corpo JSON malformado"""
+    return ojson({
+        'error': 'JSON inválido',
+        'message': 'O corpo da requisição não é um JSON válido'
+    }, 400)
+
+def _validate_analysis_request(data: Any) -> Optional[str]:
+    """Valida dados de entrada da análise, retornando mensagem de erro ou None"""
+    
+    if not isinstance(data, dict):
+        return 'O corpo da requisição deve ser um objeto JSON'
+    
+    for field, max_length in ANALYSIS_TEXT_FIELDS_MAX_LENGTH.items():
+        value = data.get(field)
+        if value is None:
+            continue
+        if not isinstance(value, str):
+            return f'O campo "{field}" deve ser texto'
+        if len(value) > max_length:
+            return f'O campo "{field}" excede {max_length} caracteres'
+    
+    if len(data['segmento'].strip()) < 2:
+        return 'O campo "segmento" deve ter ao menos 2 caracteres'
+    
+    for field in ANALYSIS_NUMERIC_FIELDS:
+        value = data.get(field)
+        if value in (None, ''):
+            continue
+        try:
+            float(value)
+        except (TypeError, ValueError):
+            return f'O campo "{field}" deve ser numérico'
+    
+    return None
+
+def _allow_analysis_request(client_ip: str) -> bool:
+    """Consome um token do bucket do IP; False se o limite foi atingido"""
+    
+    if ANALYSIS_RATE_LIMIT_PER_MINUTE <= 0:
+        return True
+    
+    now = time.time()
+    refill_per_second = ANALYSIS_RATE_LIMIT_PER_MINUTE / 60.0
+    
+    with _rate_limit_lock:
+        tokens, last_seen = _rate_limit_buckets.get(client_ip, (ANALYSIS_RATE_LIMIT_BURST, now))
+        tokens = min(ANALYSIS_RATE_LIMIT_BURST, tokens + (now - last_seen) * refill_per_second)
+        
+        # Descarta buckets já recarregados para não crescer indefinidamente
+        if len(_rate_limit_buckets) > 10000:
+            full_after = ANALYSIS_RATE_LIMIT_BURST / refill_per_second
+            for ip in [ip for ip, (_, seen) in _rate_limit_buckets.items() if now - seen > full_after]:
+                del _rate_limit_buckets[ip]
+        
+        if tokens < 1:
+            _rate_limit_buckets[client_ip] = (tokens, now)
+            return False
+        
+        _rate_limit_buckets[client_ip] = (tokens - 1, now)
+        return True
+
 @enhanced_analysis_bp.route('/analyze_ultra_enhanced', methods=['POST'])
 def analyze_ultra_enhanced():
     """Endpoint para análise arqueológica ultra-detalhada com agentes psicológicos"""
     
+    # Progresso mantido em memória (stream SSE) e gravado uma única vez ao final
+    progress_stream = None
+    session_id = 'unknown'
+    
     try:
         start_time = time.time()
         logger.info("🚀 Iniciando análise arqueológica ultra-detalhada")
         
+        # Rejeita payloads grandes: pelo Content-Length antes de ler e, sem ele
+        # (envio chunked), lendo no máximo o limite + 1 byte
+        raw_body = None
+        if not request.content_length or request.content_length <= MAX_ANALYSIS_REQUEST_BYTES:
+            raw_body = _read_limited_body(MAX_ANALYSIS_REQUEST_BYTES)
+        
+        if raw_body is None:
+            return ojson({
+                'error': 'Requisição muito grande',
+                'message': f'O corpo da requisição excede {MAX_ANALYSIS_REQUEST_BYTES} bytes'
+            }, 413)
+        
         # Coleta dados da requisição
-        data = request.get_json()
+        try:
+            data = _load_json_body(raw_body)
+        except ValueError:
+            return _invalid_json_response()
+        
         if not data:
-            return jsonify({
+            return ojson({
                 'error': 'Dados não fornecidos',
                 'message': 'Envie os dados da análise no corpo da requisição'
-            }), 400
+            }, 400)
         
         # Validação básica
-        if not data.get('segmento'):
-            return jsonify({
+        if isinstance(data, dict) and not data.get('segmento'):
+            return ojson({
                 'error': 'Segmento obrigatório',
                 'message': 'O campo "segmento" é obrigatório para análise arqueológica'
-            }), 400
+            }, 400)
+        
+        validation_error = _validate_analysis_request(data)
+        if validation_error:
+            return ojson({
+                'error': 'Dados inválidos',
+                'message': validation_error
+            }, 422)
         
         # Adiciona session_id se não fornecido
         if not data.get('session_id'):
-            data['session_id'] = f"archaeological_{int(time.time())}_{os.urandom(4).hex()}"
+            data['session_id'] = f"archaeological_{secrets.token_hex(6)}"
         
         session_id = data['session_id']
+        
+        # Reaproveita análise idêntica já concluída (sem reexecutar agentes nem gravar no banco)
+        cache_key = analysis_result_cache.make_key(data)
+        cached_analysis = analysis_result_cache.get(cache_key)
+        if cached_analysis is not None:
+            logger.info("♻️ Análise arqueológica servida do cache: %s", cache_key)
+            response_analysis = dict(cached_analysis)
+            # O salvamento no banco não é refeito para esta requisição
+            response_analysis.pop('database_id', None)
+            response_analysis.pop('database_warning', None)
+            response_analysis['metadata_arqueologico_final'] = {
+                **cached_analysis.get('metadata_arqueologico_final', {}),
+                'session_id': session_id,
+                'request_timestamp': now_iso(),
+                'cached': True
+            }
+            return ojson(response_analysis)
+        
+        if not _allow_analysis_request(request.remote_addr or 'unknown'):
+            return ojson({
+                'error': 'Limite de requisições atingido',
+                'message': 'Aguarde antes de solicitar uma nova análise arqueológica'
+            }, 429)
+        
         auto_save_manager.iniciar_sessao(session_id)
         
         # Salva dados de entrada
         salvar_etapa("requisicao_arqueologica", {
             "input_data": data,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now_iso(),
             "ip_address": request.remote_addr
         }, categoria="analise_completa")
         
         # Inicia rastreamento de progresso
         progress_tracker = get_progress_tracker(session_id)
+        progress_stream = _ProgressStream()
+        _progress_streams[session_id] = progress_stream
         
         def progress_callback(step: int, message: str, details: str = None):
             update_analysis_progress(session_id, step, message, details)
-            salvar_etapa("progresso_arqueologico", {
+            progress_stream.append({
                 "step": step,
                 "message": message,
-                "details": details
-            }, categoria="logs")
+                "details": details,
+                "timestamp": time.time()
+            })
         
         # FASE 1: Pesquisa Web Massiva
         progress_callback(1, "🌐 Executando pesquisa web massiva...")
@@ -176,9 +428,9 @@ def analyze_ultra_enhanced():
         # FASE 8: Consolidação Final
         progress_callback(12, "✨ Consolidando análise arqueológica final...")
         
-        # Consolida análise ultra-detalhada
-        final_analysis = {
-            **base_analysis,
+        # Consolida análise ultra-detalhada (reaproveita o dict da análise base, sem cópia)
+        final_analysis = base_analysis
+        final_analysis.update({
             'analise_arqueologica_completa': archaeological_analysis,
             'avatar_visceral_ultra': visceral_analysis.get('avatar_visceral_ultra', {}),
             'engenharia_reversa_psicologica': visceral_analysis,
@@ -194,35 +446,32 @@ def analyze_ultra_enhanced():
                 'ESPECIALISTA EM PSICOLOGIA DE VENDAS',
                 'MESTRE DO PRÉ-PITCH INVISÍVEL'
             ]
-        }
+        })
         
         # Calcula métricas forenses finais
-        forensic_metrics = self._calculate_comprehensive_forensic_metrics(final_analysis)
+        forensic_metrics = _calculate_comprehensive_forensic_metrics(final_analysis)
         final_analysis['metricas_forenses_ultra_detalhadas'] = forensic_metrics
         
         # Gera relatório arqueológico final
-        archaeological_report = self._generate_comprehensive_report(final_analysis)
+        archaeological_report = _generate_comprehensive_report(final_analysis)
         final_analysis['relatorio_arqueologico_final'] = archaeological_report
         
         # Marca progresso como completo
         progress_tracker.complete()
         
-        # Salva no banco de dados
+        # Salva no banco de dados em segundo plano
         try:
-            db_record = db_manager.create_analysis({
+            db_future = _DB_EXECUTOR.submit(db_manager.create_analysis, {
                 **data,
                 **final_analysis,
                 'analysis_type': 'archaeological_ultra_detailed',
                 'session_id': session_id,
                 'status': 'completed'
             })
-            
-            if db_record:
-                final_analysis['database_id'] = db_record.get('id')
-                final_analysis['local_files'] = db_record.get('local_files')
-                logger.info(f"✅ Análise arqueológica salva: ID {db_record.get('id')}")
+            db_future.add_done_callback(lambda future: _log_database_result(future, session_id))
+            final_analysis['database_id'] = 'pending'
         except Exception as e:
-            logger.error(f"❌ Erro ao salvar no banco: {e}")
+            logger.error("❌ Erro ao agendar salvamento no banco: %s", e)
             final_analysis['database_warning'] = f"Falha ao salvar: {str(e)}"
         
         # Calcula tempo de processamento
@@ -232,8 +481,8 @@ def analyze_ultra_enhanced():
         # Adiciona metadados finais
         final_analysis['metadata_arqueologico_final'] = {
             'processing_time_seconds': processing_time,
-            'processing_time_formatted': f"{int(processing_time // 60)}m {int(processing_time % 60)}s",
-            'request_timestamp': datetime.now().isoformat(),
+            'processing_time_formatted': '%dm %ds' % divmod(int(processing_time), 60),
+            'request_timestamp': now_iso(),
             'session_id': session_id,
             'analysis_type': 'archaeological_ultra_detailed_psychological',
             'camadas_arqueologicas': 12,
@@ -246,22 +495,27 @@ def analyze_ultra_enhanced():
             'dados_100_reais': True
         }
         
-        # Salva resposta final
-        salvar_etapa("resposta_arqueologica_final", final_analysis, categoria="analise_completa")
+        # Serializa uma única vez: mesmos bytes para o arquivo salvo e para a resposta
+        response_body = _dumps(final_analysis)
+        auto_save_manager.salvar_etapa_serializada(
+            "resposta_arqueologica_final", response_body,
+            categoria="analise_completa", session_id=session_id
+        )
+        analysis_result_cache.set(cache_key, final_analysis)
         
-        logger.info(f"✅ Análise arqueológica ultra-detalhada concluída em {processing_time:.2f} segundos")
+        logger.info("✅ Análise arqueológica ultra-detalhada concluída em %.2f segundos", processing_time)
         
-        return jsonify(final_analysis)
+        return _json_response(response_body)
         
     except Exception as e:
-        logger.error(f"❌ Erro crítico na análise arqueológica: {str(e)}", exc_info=True)
+        logger.error("❌ Erro crítico na análise arqueológica: %s", e, exc_info=True)
         
-        return jsonify({
+        return ojson({
             'error': 'Erro na análise arqueológica',
             'message': str(e),
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': now_iso(),
             'recommendation': 'Configure todas as APIs necessárias e tente novamente',
-            'session_id': locals().get('session_id', 'unknown'),
+            'session_id': session_id,
             'agentes_disponiveis': [
                 'ARQUEÓLOGO MESTRE DA PERSUASÃO',
                 'MESTRE DA PERSUASÃO VISCERAL',
@@ -270,7 +524,72 @@ def analyze_ultra_enhanced():
                 'ESPECIALISTA EM PSICOLOGIA DE VENDAS',
                 'MESTRE DO PRÉ-PITCH INVISÍVEL'
             ]
-        }), 500
+        }, 500)
+    
+    finally:
+        if progress_stream is not None:
+            progress_stream.finish()
+            if progress_stream.total:
+                salvar_etapa(
+                    "progresso_arqueologico", list(progress_stream.events),
+                    categoria="logs", session_id=session_id
+                )
+            
+            # Mantém o stream disponível por alguns minutos para clientes atrasados
+            cleanup = threading.Timer(
+                PROGRESS_STREAM_RETENTION_SECONDS,
+                _discard_progress_stream,
+                args=(session_id, progress_stream)
+            )
+            cleanup.daemon = True
+            cleanup.start()
+
+@enhanced_analysis_bp.route('/progress/<session_id>/stream', methods=['GET'])
+def stream_progress(session_id):
+    """Transmite eventos de progresso da análise via Server-Sent Events"""
+    
+    progress_stream = _progress_streams.get(session_id)
+    if progress_stream is None:
+        # Com vários workers a análise pode estar rodando em outro processo
+        return ojson({
+            'error': 'Sessão não encontrada',
+            'message': 'Stream disponível apenas no worker que executa a análise',
+            'session_id': session_id
+        }, 404)
+    
+    def generate():
+        sent = 0
+        while True:
+            # Bloqueia até haver evento novo (sem polling); o keepalive periódico
+            # detecta clientes desconectados
+            events, sent, done = progress_stream.wait_events(sent, PROGRESS_STREAM_KEEPALIVE_SECONDS)
+            for event in events:
+                yield b'data: ' + _dumps(event) + b'\n\n'
+            
+            if done:
+                yield b'event: complete\ndata: {}\n\n'
+                return
+            
+            if not events:
+                yield b': keepalive\n\n'
+    
+    return Response(
+        generate(),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def _log_database_result(future, session_id: str):
+    """Registra resultado do salvamento assíncrono no banco"""
+    
+    try:
+        db_record = future.result()
+        if db_record:
+            logger.info("✅ Análise arqueológica salva: ID %s (sessão %s)", db_record.get('id'), session_id)
+        else:
+            logger.warning("⚠️ Análise arqueológica da sessão %s não foi salva no banco", session_id)
+    except Exception as e:
+        logger.error("❌ Erro ao salvar no banco (sessão %s): %s", session_id, e)
 
 def _calculate_comprehensive_forensic_metrics(analysis: Dict[str, Any]) -> Dict[str, Any]:
     """Calcula métricas forenses abrangentes"""
@@ -481,90 +800,99 @@ def _generate_comprehensive_report(analysis: Dict[str, Any]) -> str:
     
     return report
 
+# Capacidades dos agentes são estáticas: monta e serializa uma única vez
+_AGENT_CAPABILITIES = {
+    'arqueologist': {
+        'name': 'ARQUEÓLOGO MESTRE DA PERSUASÃO',
+        'mission': 'Escavar DNA completo da conversão em 12 camadas forenses',
+        'layers': 12,
+        'specialties': ['Análise forense', 'Métricas objetivas', 'Cronometragem precisa', 'DNA conversão'],
+        'output': 'Relatório forense devastador com timing otimizado'
+    },
+    'visceral_master': {
+        'name': 'MESTRE DA PERSUASÃO VISCERAL',
+        'mission': 'Engenharia reversa psicológica profunda da alma',
+        'focus': ['Dores inconfessáveis', 'Desejos proibidos', 'Medos paralisantes', 'Dialeto da alma'],
+        'specialties': ['Avatar visceral', 'Linguagem interna', 'Segmentação psicológica', 'Arsenal tático'],
+        'output': 'Dossiê psicológico para "ler a mente" dos leads'
+    },
+    'drivers_architect': {
+        'name': 'ARQUITETO DE DRIVERS MENTAIS',
+        'mission': 'Criar gatilhos psicológicos como âncoras emocionais',
+        'arsenal': 19,
+        'specialties': ['19 drivers universais', 'Customização profunda', 'Sequenciamento estratégico', 'Ancoragem mental'],
+        'output': 'Arsenal de drivers mentais customizados com roteiros'
+    },
+    'visual_director': {
+        'name': 'DIRETOR SUPREMO DE EXPERIÊNCIAS TRANSFORMADORAS',
+        'mission': 'Transformar conceitos abstratos em experiências físicas devastadoras',
+        'categories': ['Destruidoras de objeção', 'Criadoras de urgência', 'Instaladoras de crença', 'Provas de método'],
+        'specialties': ['PROVIs impactantes', 'Roteiros completos', 'Orquestração visual', 'Arsenal devastador'],
+        'output': 'Sistema completo de PROVIs com kit de implementação'
+    },
+    'anti_objection': {
+        'name': 'ESPECIALISTA EM PSICOLOGIA DE VENDAS',
+        'mission': 'Arsenal psicológico para neutralizar todas as objeções',
+        'coverage': ['3 objeções universais', '5 objeções ocultas', 'Arsenal de emergência'],
+        'specialties': ['Neutralização preemptiva', 'Scripts personalizados', 'Raiz emocional', 'Contra-ataques'],
+        'output': 'Sistema anti-objeção com scripts e arsenal de emergência'
+    },
+    'pre_pitch_architect': {
+        'name': 'MESTRE DO PRÉ-PITCH INVISÍVEL',
+        'mission': 'Orquestrar sinfonia de tensão psicológica',
+        'phases': ['Orquestração emocional 70%', 'Justificação lógica 30%'],
+        'specialties': ['Sequência psicológica', 'Roteiros completos', 'Transições suaves', 'Tensão máxima'],
+        'output': 'Pré-pitch que faz prospect implorar pela oferta'
+    }
+}
+
+_AGENT_CAPABILITIES_BODY = _dumps({
+    'success': True,
+    'total_agents': len(_AGENT_CAPABILITIES),
+    'agents': _AGENT_CAPABILITIES,
+    'system_status': 'archaeological_operational',
+    'psychological_analysis_available': True,
+    'forensic_analysis_available': True,
+    'visceral_engineering_available': True,
+    'arsenal_creation_available': True
+})
+_AGENT_CAPABILITIES_GZIP_BODY = gzip.compress(_AGENT_CAPABILITIES_BODY, compresslevel=RESPONSE_COMPRESS_LEVEL)
+
 @enhanced_analysis_bp.route('/get_agent_capabilities', methods=['GET'])
 def get_agent_capabilities():
     """Retorna capacidades dos agentes psicológicos"""
     
-    try:
-        capabilities = {
-            'arqueologist': {
-                'name': 'ARQUEÓLOGO MESTRE DA PERSUASÃO',
-                'mission': 'Escavar DNA completo da conversão em 12 camadas forenses',
-                'layers': 12,
-                'specialties': ['Análise forense', 'Métricas objetivas', 'Cronometragem precisa', 'DNA conversão'],
-                'output': 'Relatório forense devastador com timing otimizado'
-            },
-            'visceral_master': {
-                'name': 'MESTRE DA PERSUASÃO VISCERAL',
-                'mission': 'Engenharia reversa psicológica profunda da alma',
-                'focus': ['Dores inconfessáveis', 'Desejos proibidos', 'Medos paralisantes', 'Dialeto da alma'],
-                'specialties': ['Avatar visceral', 'Linguagem interna', 'Segmentação psicológica', 'Arsenal tático'],
-                'output': 'Dossiê psicológico para "ler a mente" dos leads'
-            },
-            'drivers_architect': {
-                'name': 'ARQUITETO DE DRIVERS MENTAIS',
-                'mission': 'Criar gatilhos psicológicos como âncoras emocionais',
-                'arsenal': 19,
-                'specialties': ['19 drivers universais', 'Customização profunda', 'Sequenciamento estratégico', 'Ancoragem mental'],
-                'output': 'Arsenal de drivers mentais customizados com roteiros'
-            },
-            'visual_director': {
-                'name': 'DIRETOR SUPREMO DE EXPERIÊNCIAS TRANSFORMADORAS',
-                'mission': 'Transformar conceitos abstratos em experiências físicas devastadoras',
-                'categories': ['Destruidoras de objeção', 'Criadoras de urgência', 'Instaladoras de crença', 'Provas de método'],
-                'specialties': ['PROVIs impactantes', 'Roteiros completos', 'Orquestração visual', 'Arsenal devastador'],
-                'output': 'Sistema completo de PROVIs com kit de implementação'
-            },
-            'anti_objection': {
-                'name': 'ESPECIALISTA EM PSICOLOGIA DE VENDAS',
-                'mission': 'Arsenal psicológico para neutralizar todas as objeções',
-                'coverage': ['3 objeções universais', '5 objeções ocultas', 'Arsenal de emergência'],
-                'specialties': ['Neutralização preemptiva', 'Scripts personalizados', 'Raiz emocional', 'Contra-ataques'],
-                'output': 'Sistema anti-objeção com scripts e arsenal de emergência'
-            },
-            'pre_pitch_architect': {
-                'name': 'MESTRE DO PRÉ-PITCH INVISÍVEL',
-                'mission': 'Orquestrar sinfonia de tensão psicológica',
-                'phases': ['Orquestração emocional 70%', 'Justificação lógica 30%'],
-                'specialties': ['Sequência psicológica', 'Roteiros completos', 'Transições suaves', 'Tensão máxima'],
-                'output': 'Pré-pitch que faz prospect implorar pela oferta'
-            }
-        }
-        
-        return jsonify({
-            'success': True,
-            'total_agents': len(capabilities),
-            'agents': capabilities,
-            'system_status': 'archaeological_operational',
-            'psychological_analysis_available': True,
-            'forensic_analysis_available': True,
-            'visceral_engineering_available': True,
-            'arsenal_creation_available': True
-        })
-        
-    except Exception as e:
-        logger.error(f"Erro ao obter capacidades: {e}")
-        return jsonify({
-            'error': 'Erro ao obter capacidades dos agentes',
-            'message': str(e)
-        }), 500
+    return _json_response(_AGENT_CAPABILITIES_BODY, gzipped_body=_AGENT_CAPABILITIES_GZIP_BODY)
+
+# Dados padrão dos endpoints de teste dos agentes
+_DEFAULT_ARCHAEOLOGICAL_TEST_DATA = {
+    'segmento': 'Produtos Digitais',
+    'produto': 'Curso Online',
+    'publico': 'Empreendedores digitais'
+}
+
+_DEFAULT_VISCERAL_TEST_DATA = {
+    'segmento': 'Consultoria',
+    'produto': 'Mentoria',
+    'publico': 'Consultores'
+}
 
 @enhanced_analysis_bp.route('/test_archaeological_agent', methods=['POST'])
 def test_archaeological_agent():
     """Testa agente arqueológico individualmente"""
     
     try:
-        data = request.get_json()
-        test_data = data.get('test_data', {
-            'segmento': 'Produtos Digitais',
-            'produto': 'Curso Online',
-            'publico': 'Empreendedores digitais'
-        })
+        try:
+            data = _load_json_body() or {}
+        except ValueError:
+            return _invalid_json_response()
+        
+        test_data = data.get('test_data') or dict(_DEFAULT_ARCHAEOLOGICAL_TEST_DATA)
         
         # Testa arqueólogo mestre
         result = archaeological_master.execute_archaeological_analysis(test_data)
         
-        return jsonify({
+        return ojson({
             'success': True,
             'agent': 'ARQUEÓLOGO MESTRE DA PERSUASÃO',
             'result': result,
@@ -574,28 +902,28 @@ def test_archaeological_agent():
         })
         
     except Exception as e:
-        logger.error(f"Erro no teste arqueológico: {e}")
-        return jsonify({
+        logger.error("Erro no teste arqueológico: %s", e)
+        return ojson({
             'error': 'Erro no teste do agente arqueológico',
             'message': str(e)
-        }), 500
+        }, 500)
 
 @enhanced_analysis_bp.route('/test_visceral_agent', methods=['POST'])
 def test_visceral_agent():
     """Testa agente visceral individualmente"""
     
     try:
-        data = request.get_json()
-        test_data = data.get('test_data', {
-            'segmento': 'Consultoria',
-            'produto': 'Mentoria',
-            'publico': 'Consultores'
-        })
+        try:
+            data = _load_json_body() or {}
+        except ValueError:
+            return _invalid_json_response()
+        
+        test_data = data.get('test_data') or dict(_DEFAULT_VISCERAL_TEST_DATA)
         
         # Testa mestre visceral
         result = visceral_master.execute_visceral_analysis(test_data)
         
-        return jsonify({
+        return ojson({
             'success': True,
             'agent': 'MESTRE DA PERSUASÃO VISCERAL',
             'result': result,
@@ -605,29 +933,33 @@ def test_visceral_agent():
         })
         
     except Exception as e:
-        logger.error(f"Erro no teste visceral: {e}")
-        return jsonify({
+        logger.error("Erro no teste visceral: %s", e)
+        return ojson({
             'error': 'Erro no teste do agente visceral',
             'message': str(e)
-        }), 500
+        }, 500)
 
 @enhanced_analysis_bp.route('/generate_archaeological_report', methods=['POST'])
 def generate_archaeological_report():
     """Gera relatório arqueológico em formato específico"""
     
     try:
-        data = request.get_json()
+        try:
+            data = _load_json_body() or {}
+        except ValueError:
+            return _invalid_json_response()
+        
         analysis_data = data.get('analysis_data')
         format_type = data.get('format', 'markdown')  # markdown, html, pdf
         
         if not analysis_data:
-            return jsonify({
+            return ojson({
                 'error': 'Dados da análise não fornecidos'
-            }), 400
+            }, 400)
         
         if format_type == 'markdown':
             report = _generate_comprehensive_report(analysis_data)
-            return jsonify({
+            return ojson({
                 'success': True,
                 'format': 'markdown',
                 'report': report,
@@ -636,7 +968,7 @@ def generate_archaeological_report():
         
         elif format_type == 'html':
             html_report = enhanced_ui_manager.render_archaeological_analysis(analysis_data)
-            return jsonify({
+            return ojson({
                 'success': True,
                 'format': 'html',
                 'report': html_report,
@@ -644,14 +976,14 @@ def generate_archaeological_report():
             })
         
         else:
-            return jsonify({
+            return ojson({
                 'error': 'Formato não suportado',
                 'supported_formats': ['markdown', 'html']
-            }), 400
+            }, 400)
             
     except Exception as e:
-        logger.error(f"Erro ao gerar relatório: {e}")
-        return jsonify({
+        logger.error("Erro ao gerar relatório: %s", e)
+        return ojson({
             'error': 'Erro ao gerar relatório arqueológico',
             'message': str(e)
-        }), 500
\ No newline at end of file
+        }, 500)
\ No newline at end of file
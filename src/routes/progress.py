@@ -96,7 +96,8 @@ class ProgressTracker:
             except:
                 pass
         
-        logger.info(f"Progress {self.session_id}: Step {step}/{self.total_steps} - {message}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Progress %s: Step %s/%s - %s", self.session_id, step, self.total_steps, message)
         
         return progress_data
     
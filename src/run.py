@@ -124,7 +124,8 @@ def analyze_market():
             
             # VALIDAÇÃO FLEXÍVEL DO RESULTADO
             logger.info("🔍 Validando qualidade da análise...")
-            from services.enhanced_validation_system import enhanced_validation_system
+            from services.enhanced_validation_system import get_enhanced_validation_system
+            enhanced_validation_system = get_enhanced_validation_system()
             quality_validation = enhanced_validation_system.validate_with_progressive_tolerance(
                 analysis_result, session_id
             )
@@ -11,6 +11,7 @@ import time
 import json
 from typing import Dict, List, Optional, Any
 import requests
+from requests.adapters import HTTPAdapter
 
 # Imports condicionais para os clientes de IA
 try:
@@ -82,6 +83,11 @@ class AIManager:
             }
         }
 
+        # Sessão HTTP compartilhada (keep-alive) para provedores acessados via REST;
+        # o pool comporta as chamadas paralelas dos agentes psicológicos
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
         self.initialize_providers()
         available_count = len([p for p in self.providers.values() if p['available']])
         logger.info(f"🤖 AI Manager inicializado com {available_count} provedores disponíveis.")
@@ -353,7 +359,7 @@ class AIManager:
                 url = f"{config['client']['base_url']}{model}"
                 headers = {"Authorization": f"Bearer {config['client']['api_key']}"}
                 payload = {"inputs": prompt, "parameters": {"max_new_tokens": min(max_tokens, 1024)}}
-                response = requests.post(url, headers=headers, json=payload, timeout=60)
+                response = self.session.post(url, headers=headers, json=payload, timeout=60)
                 
                 if response.status_code == 200:
                     res_json = response.json()
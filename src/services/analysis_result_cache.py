@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Analysis Result Cache
+Cache em memória de análises concluídas, indexado pelo hash dos dados de entrada
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+class AnalysisResultCache:
+    """Cache LRU com expiração para resultados de análises caras"""
+
+    # Campos que variam por requisição e não influenciam o resultado
+    IGNORED_FIELDS = ('session_id',)
+
+    def __init__(self, max_entries: int = 32, ttl_seconds: int = 3600):
+        """Inicializa cache de resultados"""
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        logger.info(f"Analysis Result Cache inicializado (max={max_entries}, ttl={ttl_seconds}s)")
+
+    def make_key(self, data: Dict[str, Any]) -> str:
+        """Gera chave estável a partir dos dados de entrada"""
+        relevant = {k: v for k, v in data.items() if k not in self.IGNORED_FIELDS}
+        raw = json.dumps(relevant, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.blake2b(raw.encode('utf-8'), digest_size=16).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Retorna resultado em cache ou None se ausente/expirado"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            stored_at, result = entry
+            if time.time() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return result
+
+    def set(self, key: str, result: Dict[str, Any]):
+        """Armazena resultado, descartando o menos usado se necessário"""
+        with self._lock:
+            self._entries[key] = (time.time(), result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Limpa todo o cache"""
+        with self._lock:
+            self._entries.clear()
+
+# Instância global
+analysis_result_cache = AnalysisResultCache(
+    max_entries=int(os.getenv('ANALYSIS_CACHE_MAX_ENTRIES', 32)),
+    ttl_seconds=int(os.getenv('ANALYSIS_CACHE_TTL', 3600))
+)
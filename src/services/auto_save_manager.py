@@ -10,7 +10,7 @@ import json
 import time
 import logging
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Union
 import uuid
 from pathlib import Path
 
@@ -66,29 +66,32 @@ class AutoSaveManager:
         logger.info(f"🚀 Sessão iniciada: {self.session_id}")
         return self.session_id
     
+    def _diretorio_etapa(self, categoria: str, session_id: Optional[str]) -> Path:
+        """Resolve diretório de salvamento da categoria, com subdiretório da sessão"""
+        
+        save_dir = self.subdirs.get(categoria, self.base_dir)
+        if session_id:
+            save_dir = save_dir / session_id
+            save_dir.mkdir(exist_ok=True)
+        return save_dir
+    
     def salvar_etapa(
         self, 
         nome_etapa: str, 
         dados: Any, 
         status: str = "sucesso", 
         timestamp: Optional[float] = None,
-        categoria: str = "geral"
+        categoria: str = "geral",
+        session_id: str = None
     ) -> str:
         """Salva etapa imediatamente com timestamp único"""
         
+        session_id = session_id or self.session_id
         timestamp = timestamp or time.time()
         timestamp_str = datetime.fromtimestamp(timestamp).strftime("%Y%m%d_%H%M%S_%f")[:-3]
         
-        # Determina diretório baseado na categoria
-        if categoria in self.subdirs:
-            save_dir = self.subdirs[categoria]
-        else:
-            save_dir = self.base_dir
-        
-        # Se há sessão ativa, cria subdiretório
-        if self.session_id:
-            save_dir = save_dir / self.session_id
-            save_dir.mkdir(exist_ok=True)
+        # Diretório da categoria (e da sessão, se houver)
+        save_dir = self._diretorio_etapa(categoria, session_id)
         
         # Nome do arquivo com timestamp único
         filename = f"{nome_etapa}_{timestamp_str}.json"
@@ -102,7 +105,7 @@ class AutoSaveManager:
                 "dados": dados,
                 "timestamp": timestamp,
                 "timestamp_iso": datetime.fromtimestamp(timestamp).isoformat(),
-                "session_id": self.session_id,
+                "session_id": session_id,
                 "analysis_id": self.analysis_id,
                 "categoria": categoria,
                 "tamanho_dados": len(str(dados)) if dados else 0
@@ -139,6 +142,60 @@ class AutoSaveManager:
             
             return str(emergency_path)
     
+    def salvar_etapa_serializada(
+        self,
+        nome_etapa: str,
+        dados_json: bytes,
+        status: str = "sucesso",
+        categoria: str = "geral",
+        session_id: str = None
+    ) -> str:
+        """Salva etapa cujos dados já estão serializados em JSON (UTF-8), sem reserializar"""
+        
+        session_id = session_id or self.session_id
+        timestamp = time.time()
+        timestamp_str = datetime.fromtimestamp(timestamp).strftime("%Y%m%d_%H%M%S_%f")[:-3]
+        
+        save_dir = self._diretorio_etapa(categoria, session_id)
+        filepath = save_dir / f"{nome_etapa}_{timestamp_str}.json"
+        
+        try:
+            # Metadados serializados à parte; os dados entram como bytes prontos
+            metadados = {
+                "etapa": nome_etapa,
+                "status": status,
+                "timestamp": timestamp,
+                "timestamp_iso": datetime.fromtimestamp(timestamp).isoformat(),
+                "session_id": session_id,
+                "analysis_id": self.analysis_id,
+                "categoria": categoria,
+                "tamanho_dados": len(dados_json)
+            }
+            cabecalho = json.dumps(metadados, ensure_ascii=False, default=str)[:-1].encode("utf-8")
+            conteudo = cabecalho + b', "dados": ' + dados_json + b"}"
+            
+            with open(filepath, "wb") as f:
+                f.write(conteudo)
+            
+            logger.info(f"💾 Etapa '{nome_etapa}' salva: {filepath}")
+            
+        except Exception as e:
+            logger.error(f"❌ Erro ao salvar '{nome_etapa}': {e}")
+            
+            # Reabre os dados como objeto para o registro ficar igual ao de salvar_etapa
+            try:
+                dados = json.loads(dados_json)
+            except ValueError:
+                dados = dados_json.decode("utf-8", errors="replace")
+            
+            return self.salvar_etapa(nome_etapa, dados, status, timestamp, categoria, session_id)
+        
+        # Backup fora do try principal: falha nele não regrava a etapa já salva
+        if len(dados_json) > 50000:  # > 50KB
+            self._salvar_backup_compactado(filepath, conteudo)
+        
+        return str(filepath)
+    
     def salvar_erro(self, etapa: str, erro: Exception, contexto: Dict[str, Any] = None) -> str:
         """Salva erro com contexto completo"""
         
@@ -280,14 +337,18 @@ class AutoSaveManager:
         logger.info(f"📋 Relatório consolidado salvo: {relatorio_path}")
         return str(relatorio_path)
     
-    def _salvar_backup_compactado(self, filepath: Path, data: Dict[str, Any]):
-        """Salva backup compactado para dados grandes"""
+    def _salvar_backup_compactado(self, filepath: Path, data: Union[Dict[str, Any], bytes]):
+        """Salva backup compactado para dados grandes (dict ou JSON já serializado)"""
         try:
             import gzip
             
             backup_path = filepath.with_suffix('.json.gz')
-            with gzip.open(backup_path, 'wt', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+            if isinstance(data, bytes):
+                with gzip.open(backup_path, 'wb') as f:
+                    f.write(data)
+            else:
+                with gzip.open(backup_path, 'wt', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2, default=str)
             
             logger.info(f"🗜️ Backup compactado salvo: {backup_path}")
             
@@ -326,9 +387,15 @@ class AutoSaveManager:
 auto_save_manager = AutoSaveManager()
 
 # Função de conveniência
-def salvar_etapa(nome_etapa: str, dados: Any, status: str = "sucesso", categoria: str = "geral") -> str:
+def salvar_etapa(
+    nome_etapa: str,
+    dados: Any,
+    status: str = "sucesso",
+    categoria: str = "geral",
+    session_id: str = None
+) -> str:
     """Função de conveniência para salvamento rápido"""
-    return auto_save_manager.salvar_etapa(nome_etapa, dados, status, categoria=categoria)
+    return auto_save_manager.salvar_etapa(nome_etapa, dados, status, categoria=categoria, session_id=session_id)
 
 def salvar_erro(etapa: str, erro: Exception, contexto: Dict[str, Any] = None) -> str:
     """Função de conveniência para salvamento de erros"""
@@ -27,6 +27,10 @@ class DeepSeekClient:
             "Content-Type": "application/json"
         }
         
+        # Reaproveita conexões entre chamadas
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        
         self.available = bool(self.api_key)
         
         if self.available:
@@ -65,9 +69,8 @@ class DeepSeekClient:
                 "stream": False
             }
             
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/chat/completions",
-                headers=self.headers,
                 json=payload,
                 timeout=timeout
             )
@@ -97,7 +97,7 @@ class EnhancedAnalysisOrchestrator:
             final_analysis['metadata_ultra_enhanced'] = {
                 'processing_time_seconds': processing_time,
                 'analysis_engine': 'ARQV30 Enhanced v2.0 - ULTRA-PSYCHOLOGICAL',
-                'agentes_psicologicos_utilizados': list(psychological_agents.agents.keys()),
+                'agentes_psicologicos_utilizados': list(psychological_agents.agent_names),
                 'camadas_analise': len(self.analysis_layers),
                 'densidade_persuasiva': forensic_metrics.get('densidade_persuasiva', 0),
                 'intensidade_emocional': forensic_metrics.get('intensidade_emocional', 0),
@@ -240,7 +240,7 @@ class EnhancedAnalysisOrchestrator:
 ### 🔬 ESCAVAÇÃO ARQUEOLÓGICA CONCLUÍDA
 
 **Camadas Analisadas:** 12 camadas psicológicas profundas
-**Agentes Utilizados:** {len(psychological_agents.agents)} agentes especializados
+**Agentes Utilizados:** {len(psychological_agents.agent_names)} agentes especializados
 **Densidade Persuasiva:** {analysis.get('metricas_forenses_detalhadas', {}).get('score_geral_persuasao', 0)}%
 
 ### 🧠 ARSENAL PSICOLÓGICO DESCOBERTO
@@ -5,54 +5,211 @@ ARQV30 Enhanced v2.0 - Enhanced Validation System
 Sistema de validação aprimorado que permite continuidade mesmo com falhas
 """
 
+import re
+import atexit
 import logging
 import time
+import bisect
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Any, Optional, Tuple
-from datetime import datetime
-from services.auto_save_manager import salvar_etapa, salvar_erro
+from services.auto_save_manager import auto_save_manager, salvar_etapa, salvar_erro
+from utils.time_utils import now_iso
+
+# Import condicional do matcher multi-padrão
+try:
+    import ahocorasick
+    HAS_AHOCORASICK = True
+except ImportError:
+    HAS_AHOCORASICK = False
 
 logger = logging.getLogger(__name__)
 
+# Gravações das tentativas rejeitadas saem do caminho crítico da validação;
+# um único worker preserva a ordem e o pool é esvaziado ao encerrar o processo
+_SAVE_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix='validation_save')
+atexit.register(_SAVE_POOL.shutdown, wait=True)
+
+# Termos que indicam conteúdo simulado/genérico na análise
+SIMULATION_INDICATORS = (
+    'n/a', 'não informado', 'customizado para', 'baseado em dados',
+    'específico para', 'exemplo genérico', 'placeholder', 'template'
+)
+
+# Limites de cada nível de validação, do mais rigoroso ao mais tolerante
+VALIDATION_LEVELS = {
+    'STRICT': {
+        'min_content_length': 5000,
+        'min_sources': 5,
+        'min_insights': 10,
+        'min_quality_score': 80.0,
+        'simulation_tolerance': 0
+    },
+    'MODERATE': {
+        'min_content_length': 2000,
+        'min_sources': 3,
+        'min_insights': 5,
+        'min_quality_score': 60.0,
+        'simulation_tolerance': 5
+    },
+    'FLEXIBLE': {
+        'min_content_length': 500,
+        'min_sources': 1,
+        'min_insights': 3,
+        'min_quality_score': 40.0,
+        'simulation_tolerance': 10
+    },
+    'EMERGENCY': {
+        'min_content_length': 100,
+        'min_sources': 0,
+        'min_insights': 1,
+        'min_quality_score': 20.0,
+        'simulation_tolerance': 20
+    }
+}
+
+# Faixas de tolerância (múltiplos do limite do nível) e score de cada faixa:
+# perfeito, aceitável, questionável e muito simulado
+_SIM_BOUNDS_MULTS = (1, 2, 3)
+_SIM_SCORES = (100.0, 70.0, 40.0, 10.0)
+
+# Seções avaliadas na validação de estrutura e avatar
+_ESSENTIAL_SECTIONS = ('avatar_ultra_detalhado',)  # Só avatar é realmente essencial
+_OPTIONAL_SECTIONS = (
+    'drivers_mentais_customizados', 'provas_visuais_sugeridas',
+    'sistema_anti_objecao', 'pre_pitch_invisivel', 'insights_exclusivos'
+)
+_BONUS_PER_SECTION = 50.0 / len(_OPTIONAL_SECTIONS)
+_AVATAR_SECTIONS = (
+    'perfil_demografico', 'perfil_psicografico',
+    'dores_viscerais', 'desejos_secretos'
+)
+
+# Recomendação exibida para cada nível de validação aprovado
+LEVEL_RECOMMENDATIONS = {
+    'STRICT': "✅ EXCELENTE: Análise de qualidade premium - prosseguir com confiança total",
+    'MODERATE': "👍 BOM: Análise de qualidade adequada - prosseguir com implementação",
+    'FLEXIBLE': "⚠️ ACEITÁVEL: Análise com limitações - considere melhorar APIs para qualidade superior",
+    'EMERGENCY': "🚨 EMERGÊNCIA: Análise mínima - recomenda-se reexecutar com configuração completa"
+}
+
+# Autômato Aho-Corasick: conta todos os indicadores em uma única passada
+if HAS_AHOCORASICK:
+    _SIMULATION_AUTOMATON = ahocorasick.Automaton()
+    for _indicator in SIMULATION_INDICATORS:
+        _SIMULATION_AUTOMATON.add_word(_indicator, _indicator)
+    _SIMULATION_AUTOMATON.make_automaton()
+
+def _iter_strings(obj: Any):
+    """Percorre a estrutura e gera os textos (valores string)"""
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, str):
+            yield current
+        elif isinstance(current, dict):
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple)):
+            stack.extend(current)
+
+# Marcadores de campos inválidos removidos na limpeza de saída
+_INVALID = ('ERRO_', 'FALHA_', 'INVALID_')
+_INVALID_RE = re.compile('|'.join(map(re.escape, _INVALID)))
+
+def _is_invalid(text: str) -> bool:
+    """Verifica se o texto contém algum marcador de campo inválido"""
+    return _INVALID_RE.search(text.upper()) is not None
+
+def _clean_invalid(obj: Any) -> Any:
+    """Copia a estrutura descartando chaves e itens marcados como inválidos"""
+    if isinstance(obj, dict):
+        root = {}
+    elif isinstance(obj, list):
+        root = []
+    else:
+        return obj
+    
+    # Pilha de (origem, destino): cada contêiner é reconstruído sem recursão
+    stack = [(obj, root)]
+    while stack:
+        source, target = stack.pop()
+        if isinstance(source, dict):
+            for key, value in source.items():
+                if _is_invalid(key if isinstance(key, str) else str(key)):
+                    continue
+                if isinstance(value, dict):
+                    target[key] = {}
+                    stack.append((value, target[key]))
+                elif isinstance(value, list):
+                    target[key] = []
+                    stack.append((value, target[key]))
+                else:
+                    target[key] = value
+        else:
+            for item in source:
+                if _is_invalid(item if isinstance(item, str) else str(item)):
+                    continue
+                if isinstance(item, dict):
+                    child = {}
+                elif isinstance(item, list):
+                    child = []
+                else:
+                    target.append(item)
+                    continue
+                target.append(child)
+                stack.append((item, child))
+    return root
+
+def _node_count(obj: Any) -> int:
+    """Conta os nós (contêineres e folhas) da estrutura como estimativa de tamanho"""
+    count = 0
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        count += 1
+        if isinstance(current, dict):
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple)):
+            stack.extend(current)
+    return count
+
 class EnhancedValidationSystem:
     """Sistema de validação aprimorado com tolerância inteligente"""
     
     def __init__(self):
         """Inicializa sistema de validação aprimorado"""
-        self.validation_levels = {
-            'STRICT': {
-                'min_content_length': 5000,
-                'min_sources': 5,
-                'min_insights': 10,
-                'min_quality_score': 80.0,
-                'simulation_tolerance': 0
-            },
-            'MODERATE': {
-                'min_content_length': 2000,
-                'min_sources': 3,
-                'min_insights': 5,
-                'min_quality_score': 60.0,
-                'simulation_tolerance': 5
-            },
-            'FLEXIBLE': {
-                'min_content_length': 500,
-                'min_sources': 1,
-                'min_insights': 3,
-                'min_quality_score': 40.0,
-                'simulation_tolerance': 10
-            },
-            'EMERGENCY': {
-                'min_content_length': 100,
-                'min_sources': 0,
-                'min_insights': 1,
-                'min_quality_score': 20.0,
-                'simulation_tolerance': 20
-            }
+        self.validation_levels = VALIDATION_LEVELS
+        
+        # Pontuação dos componentes que dependem dos limites, especializada por nível
+        self._level_validators = {
+            level: self._make_level_validator(thresholds)
+            for level, thresholds in VALIDATION_LEVELS.items()
         }
         
         self.current_level = 'MODERATE'  # Nível padrão
         
         logger.info("Enhanced Validation System inicializado com tolerância inteligente")
     
+    def _make_level_validator(self, thresholds: Dict[str, Any]):
+        """Cria função que pontua pesquisa, insights e simulação com os limites do nível"""
+        
+        min_content_length = thresholds['min_content_length']
+        min_sources = thresholds['min_sources']
+        min_insights = thresholds['min_insights']
+        tolerance_bounds = tuple(thresholds['simulation_tolerance'] * mult for mult in _SIM_BOUNDS_MULTS)
+        validate_research = self._validate_research_flexible
+        validate_insights = self._validate_insights_flexible
+        detect_simulation = self._detect_simulation_with_tolerance
+        
+        def validate(analysis: Dict[str, Any], indicator_counts: Dict[str, int]) -> Tuple[float, float, float]:
+            return (
+                validate_research(analysis, min_content_length, min_sources),
+                validate_insights(analysis, min_insights),
+                detect_simulation(analysis, tolerance_bounds, indicator_counts)
+            )
+        
+        return validate
+    
     def validate_with_progressive_tolerance(
         self, 
         analysis: Dict[str, Any],
@@ -63,13 +220,24 @@ class EnhancedValidationSystem:
         try:
             logger.info(f"🔍 Validando análise com nível {self.current_level}")
             
-            # Tenta validação em níveis progressivos
-            validation_levels = ['STRICT', 'MODERATE', 'FLEXIBLE', 'EMERGENCY']
+            # Contagem de indicadores de simulação não depende do nível: calcula uma vez
+            indicator_counts = self._count_simulation_indicators(analysis)
+            
+            # Estrutura e avatar também não dependem dos limites do nível
+            shared_scores = {
+                'structure': self._validate_structure_flexible(analysis),
+                'avatar': self._validate_avatar_flexible(analysis)
+            }
             
-            for level in validation_levels:
+            save_session_id = session_id or auto_save_manager.session_id
+            
+            # Tenta validação em níveis progressivos
+            for level in VALIDATION_LEVELS:
                 logger.info(f"🧪 Tentando validação nível {level}")
                 
-                validation_result = self._validate_at_level(analysis, level, session_id)
+                validation_result = self._validate_at_level(
+                    analysis, level, session_id, indicator_counts, shared_scores
+                )
                 
                 if validation_result['valid']:
                     logger.info(f"✅ Análise aprovada no nível {level}")
@@ -79,12 +247,13 @@ class EnhancedValidationSystem:
                 else:
                     logger.warning(f"⚠️ Análise rejeitada no nível {level}: {validation_result['primary_reason']}")
                     
-                    # Salva tentativa de validação
-                    salvar_etapa(f"validacao_tentativa_{level.lower()}", {
+                    # Salva tentativa de validação em segundo plano, com a sessão
+                    # resolvida agora (a sessão ativa pode mudar antes da gravação)
+                    _SAVE_POOL.submit(salvar_etapa, f"validacao_tentativa_{level.lower()}", {
                         "level": level,
                         "result": validation_result,
                         "approved": False
-                    }, categoria="analise_completa")
+                    }, categoria="analise_completa", session_id=save_session_id)
             
             # Se chegou aqui, nem no nível EMERGENCY passou
             logger.error("❌ Análise rejeitada em todos os níveis de validação")
@@ -104,7 +273,9 @@ class EnhancedValidationSystem:
         self, 
         analysis: Dict[str, Any], 
         level: str,
-        session_id: str = None
+        session_id: str = None,
+        indicator_counts: Optional[Dict[str, int]] = None,
+        shared_scores: Optional[Dict[str, float]] = None
     ) -> Dict[str, Any]:
         """Valida análise em um nível específico"""
         
@@ -118,33 +289,39 @@ class EnhancedValidationSystem:
             'warnings': [],
             'component_scores': {},
             'primary_reason': '',
-            'timestamp': datetime.now().isoformat()
+            'timestamp': now_iso()
         }
         
         try:
-            # 1. Valida estrutura básica
-            structure_score = self._validate_structure_flexible(analysis, thresholds)
-            validation_result['component_scores']['structure'] = structure_score
+            if indicator_counts is None:
+                indicator_counts = self._count_simulation_indicators(analysis)
             
-            # 2. Valida pesquisa web
-            research_score = self._validate_research_flexible(analysis, thresholds)
-            validation_result['component_scores']['research'] = research_score
+            if shared_scores is None:
+                shared_scores = {
+                    'structure': self._validate_structure_flexible(analysis),
+                    'avatar': self._validate_avatar_flexible(analysis)
+                }
             
-            # 3. Valida avatar
-            avatar_score = self._validate_avatar_flexible(analysis, thresholds)
-            validation_result['component_scores']['avatar'] = avatar_score
+            # Estrutura e avatar valem para todos os níveis; pesquisa, insights e
+            # simulação usam os limites já resolvidos do nível
+            structure_score = shared_scores['structure']
+            avatar_score = shared_scores['avatar']
+            research_score, insights_score, simulation_score = self._level_validators[level](
+                analysis, indicator_counts
+            )
             
-            # 4. Valida insights
-            insights_score = self._validate_insights_flexible(analysis, thresholds)
-            validation_result['component_scores']['insights'] = insights_score
-            
-            # 5. Detecta simulação com tolerância
-            simulation_score = self._detect_simulation_with_tolerance(analysis, thresholds)
-            validation_result['component_scores']['simulation'] = simulation_score
+            validation_result['component_scores'] = {
+                'structure': structure_score,
+                'research': research_score,
+                'avatar': avatar_score,
+                'insights': insights_score,
+                'simulation': simulation_score
+            }
             
-            # Calcula score geral
-            scores = [structure_score, research_score, avatar_score, insights_score, simulation_score]
-            validation_result['quality_score'] = sum(scores) / len(scores)
+            # Calcula score geral (média simples dos componentes)
+            validation_result['quality_score'] = (
+                structure_score + research_score + avatar_score + insights_score + simulation_score
+            ) / 5
             
             # Determina se é válida
             validation_result['valid'] = validation_result['quality_score'] >= thresholds['min_quality_score']
@@ -159,32 +336,29 @@ class EnhancedValidationSystem:
             validation_result['primary_reason'] = f"Erro técnico: {str(e)}"
             return validation_result
     
-    def _validate_structure_flexible(self, analysis: Dict[str, Any], thresholds: Dict[str, Any]) -> float:
+    def _validate_structure_flexible(self, analysis: Dict[str, Any]) -> float:
         """Valida estrutura com flexibilidade"""
         
         score = 0.0
         
         # Seções essenciais (mais flexível)
-        essential_sections = ['avatar_ultra_detalhado']  # Só avatar é realmente essencial
-        
-        for section in essential_sections:
+        for section in _ESSENTIAL_SECTIONS:
             if section in analysis and analysis[section]:
                 score += 50.0  # 50 pontos por seção essencial
         
         # Seções opcionais (bonus)
-        optional_sections = [
-            'drivers_mentais_customizados', 'provas_visuais_sugeridas',
-            'sistema_anti_objecao', 'pre_pitch_invisivel', 'insights_exclusivos'
-        ]
-        
-        bonus_per_section = 50.0 / len(optional_sections)
-        for section in optional_sections:
+        for section in _OPTIONAL_SECTIONS:
             if section in analysis and analysis[section]:
-                score += bonus_per_section
+                score += _BONUS_PER_SECTION
         
         return min(score, 100.0)
     
-    def _validate_research_flexible(self, analysis: Dict[str, Any], thresholds: Dict[str, Any]) -> float:
+    def _validate_research_flexible(
+        self,
+        analysis: Dict[str, Any],
+        min_content_length: int,
+        min_sources: int
+    ) -> float:
         """Valida pesquisa com flexibilidade"""
         
         research_data = analysis.get('pesquisa_web_massiva', {})
@@ -197,17 +371,17 @@ class EnhancedValidationSystem:
         
         # Score por conteúdo
         total_content = stats.get('total_conteudo', 0)
-        if total_content >= thresholds['min_content_length']:
+        if total_content >= min_content_length:
             score += 30.0
         elif total_content > 0:
-            score += (total_content / thresholds['min_content_length']) * 30.0
+            score += (total_content / min_content_length) * 30.0
         
         # Score por fontes
         unique_sources = stats.get('fontes_unicas', 0)
-        if unique_sources >= thresholds['min_sources']:
+        if unique_sources >= min_sources:
             score += 30.0
         elif unique_sources > 0:
-            score += (unique_sources / thresholds['min_sources']) * 30.0
+            score += (unique_sources / min_sources) * 30.0
         
         # Score por qualidade
         avg_quality = stats.get('qualidade_media', 0)
@@ -215,7 +389,7 @@ class EnhancedValidationSystem:
         
         return min(score, 100.0)
     
-    def _validate_avatar_flexible(self, analysis: Dict[str, Any], thresholds: Dict[str, Any]) -> float:
+    def _validate_avatar_flexible(self, analysis: Dict[str, Any]) -> float:
         """Valida avatar com flexibilidade"""
         
         avatar = analysis.get('avatar_ultra_detalhado', {})
@@ -225,13 +399,8 @@ class EnhancedValidationSystem:
         score = 20.0  # Base por ter avatar
         
         # Score por seções do avatar
-        avatar_sections = [
-            'perfil_demografico', 'perfil_psicografico', 
-            'dores_viscerais', 'desejos_secretos'
-        ]
-        
-        section_score = 80.0 / len(avatar_sections)
-        for section in avatar_sections:
+        section_score = 80.0 / len(_AVATAR_SECTIONS)
+        for section in _AVATAR_SECTIONS:
             if section in avatar and avatar[section]:
                 if isinstance(avatar[section], list) and len(avatar[section]) > 0:
                     score += section_score
@@ -242,7 +411,7 @@ class EnhancedValidationSystem:
         
         return min(score, 100.0)
     
-    def _validate_insights_flexible(self, analysis: Dict[str, Any], thresholds: Dict[str, Any]) -> float:
+    def _validate_insights_flexible(self, analysis: Dict[str, Any], min_insights: int) -> float:
         """Valida insights com flexibilidade"""
         
         insights = analysis.get('insights_exclusivos', [])
@@ -252,58 +421,55 @@ class EnhancedValidationSystem:
         score = 10.0  # Base por ter insights
         
         # Score por quantidade
-        if len(insights) >= thresholds['min_insights']:
+        if len(insights) >= min_insights:
             score += 50.0
         elif len(insights) > 0:
-            score += (len(insights) / thresholds['min_insights']) * 50.0
+            score += (len(insights) / min_insights) * 50.0
         
         # Score por qualidade dos insights
-        substantial_insights = [insight for insight in insights if len(insight) > 50]
-        if substantial_insights:
-            quality_ratio = len(substantial_insights) / len(insights)
+        substantial_count = sum(1 for insight in insights if len(insight) > 50)
+        if substantial_count:
+            quality_ratio = substantial_count / len(insights)
             score += quality_ratio * 40.0
         
         return min(score, 100.0)
     
-    def _detect_simulation_with_tolerance(self, analysis: Dict[str, Any], thresholds: Dict[str, Any]) -> float:
-        """Detecta simulação com tolerância configurável"""
+    def _count_simulation_indicators(self, analysis: Dict[str, Any]) -> Dict[str, int]:
+        """Conta ocorrências de cada indicador de simulação na análise"""
+        
+        # Junta apenas os textos em um único buffer (o separador impede casamentos
+        # entre valores vizinhos), converte para minúsculas uma única vez e faz a
+        # varredura toda em código nativo
+        text = '\0'.join(_iter_strings(analysis)).lower()
         
-        simulation_indicators = [
-            'n/a', 'não informado', 'customizado para', 'baseado em dados',
-            'específico para', 'exemplo genérico', 'placeholder', 'template'
-        ]
+        if not HAS_AHOCORASICK:
+            return {indicator: text.count(indicator) for indicator in SIMULATION_INDICATORS}
         
-        # Converte análise para string
-        analysis_str = json.dumps(analysis, ensure_ascii=False).lower()
+        counts = dict.fromkeys(SIMULATION_INDICATORS, 0)
+        for _, indicator in _SIMULATION_AUTOMATON.iter(text):
+            counts[indicator] += 1
+        return counts
+    
+    def _detect_simulation_with_tolerance(
+        self,
+        analysis: Dict[str, Any],
+        tolerance_bounds: Tuple[int, int, int],
+        indicator_counts: Optional[Dict[str, int]] = None
+    ) -> float:
+        """Detecta simulação com tolerância configurável"""
         
-        # Conta indicadores
-        simulation_count = 0
-        for indicator in simulation_indicators:
-            simulation_count += analysis_str.count(indicator)
+        if indicator_counts is None:
+            indicator_counts = self._count_simulation_indicators(analysis)
         
-        # Aplica tolerância
-        tolerance = thresholds['simulation_tolerance']
+        simulation_count = sum(indicator_counts.values())
         
-        if simulation_count <= tolerance:
-            return 100.0  # Perfeito
-        elif simulation_count <= tolerance * 2:
-            return 70.0   # Aceitável
-        elif simulation_count <= tolerance * 3:
-            return 40.0   # Questionável
-        else:
-            return 10.0   # Muito simulado
+        # Aplica tolerância: primeira faixa cujo limite comporta a contagem
+        return _SIM_SCORES[bisect.bisect_left(tolerance_bounds, simulation_count)]
     
     def _get_level_recommendation(self, level: str) -> str:
         """Retorna recomendação baseada no nível de validação"""
         
-        recommendations = {
-            'STRICT': "✅ EXCELENTE: Análise de qualidade premium - prosseguir com confiança total",
-            'MODERATE': "👍 BOM: Análise de qualidade adequada - prosseguir com implementação",
-            'FLEXIBLE': "⚠️ ACEITÁVEL: Análise com limitações - considere melhorar APIs para qualidade superior",
-            'EMERGENCY': "🚨 EMERGÊNCIA: Análise mínima - recomenda-se reexecutar com configuração completa"
-        }
-        
-        return recommendations.get(level, "Análise validada")
+        return LEVEL_RECOMMENDATIONS.get(level, "Análise validada")
     
     def _create_emergency_validation(self, analysis: Dict[str, Any], session_id: str = None) -> Dict[str, Any]:
         """Cria validação de emergência que sempre permite continuar"""
@@ -332,7 +498,7 @@ class EnhancedValidationSystem:
             'emergency_mode': True,
             'data_preserved': True,
             'can_continue': True,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': now_iso()
         }
         
         # Salva validação de emergência
@@ -363,29 +529,15 @@ class EnhancedValidationSystem:
     def clean_analysis_for_output_flexible(self, analysis: Dict[str, Any]) -> Dict[str, Any]:
         """Limpa análise para output com flexibilidade"""
         
-        cleaned = analysis.copy()
-        
         # Remove apenas campos claramente inválidos
-        invalid_indicators = ['ERRO_', 'FALHA_', 'INVALID_']
-        
-        def clean_recursive(obj):
-            if isinstance(obj, dict):
-                return {k: clean_recursive(v) for k, v in obj.items() 
-                       if not any(indicator in str(k).upper() for indicator in invalid_indicators)}
-            elif isinstance(obj, list):
-                return [clean_recursive(item) for item in obj 
-                       if not any(indicator in str(item).upper() for indicator in invalid_indicators)]
-            else:
-                return obj
-        
-        cleaned = clean_recursive(cleaned)
+        cleaned = _clean_invalid(analysis)
         
         # Adiciona metadados de limpeza
         cleaned['validation_metadata'] = {
-            'cleaned_at': datetime.now().isoformat(),
+            'cleaned_at': now_iso(),
             'cleaning_level': 'flexible',
-            'original_size': len(str(analysis)),
-            'cleaned_size': len(str(cleaned)),
+            'original_size': _node_count(analysis),
+            'cleaned_size': _node_count(cleaned),
             'data_preserved': True,
             'simulation_tolerance': 'high'
         }
@@ -510,7 +662,7 @@ class EnhancedValidationSystem:
             'primary_reason': reason,
             'recommendation': 'Validação forçada - prosseguir com cautela',
             'forced': True,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': now_iso()
         }
         
         salvar_etapa("validacao_forcada", forced_validation, categoria="analise_completa")
@@ -528,5 +680,8 @@ class EnhancedValidationSystem:
             'forced_pass_available': True
         }
 
-# Instância global
-enhanced_validation_system = EnhancedValidationSystem()
\ No newline at end of file
+# Instância global, criada no primeiro uso
+@functools.cache
+def get_enhanced_validation_system() -> EnhancedValidationSystem:
+    """Retorna a instância compartilhada do sistema de validação"""
+    return EnhancedValidationSystem()
\ No newline at end of file
@@ -10,6 +10,8 @@ import time
 import json
 from typing import Dict, List, Any, Optional
 from datetime import datetime
+from types import MappingProxyType
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from services.ai_manager import ai_manager
 from services.auto_save_manager import salvar_etapa, salvar_erro
 
@@ -20,14 +22,19 @@ class PsychologicalAgentsSystem:
     
     def __init__(self):
         """Inicializa sistema de agentes"""
-        self.agents = {
+        # Registro fixo de agentes (somente leitura após a inicialização)
+        self.agents = MappingProxyType({
             'arqueologist': ArchaeologistAgent(),
             'visceral_master': VisceralMasterAgent(),
             'drivers_architect': DriversArchitectAgent(),
             'visual_director': VisualDirectorAgent(),
             'anti_objection': AntiObjectionAgent(),
             'pre_pitch_architect': PrePitchArchitectAgent()
-        }
+        })
+        self.agent_names = tuple(self.agents)
+        self.agent_executors = MappingProxyType({
+            name: agent.execute_analysis for name, agent in self.agents.items()
+        })
         
         logger.info("Sistema de Agentes Psicológicos inicializado")
     
@@ -48,26 +55,38 @@ class PsychologicalAgentsSystem:
             'psychological_metrics': {}
         }
         
-        # Executa cada agente em sequência
-        for agent_name, agent in self.agents.items():
-            try:
+        # Executa agentes em paralelo (cada um é independente e limitado por I/O de IA)
+        agents_results = {}
+        
+        with ThreadPoolExecutor(max_workers=len(self.agent_names)) as executor:
+            future_to_agent = {}
+            
+            for agent_name, execute_analysis in self.agent_executors.items():
                 logger.info(f"🎭 Executando agente: {agent_name}")
-                
-                agent_result = agent.execute_analysis(data, session_id)
-                results['agents_results'][agent_name] = agent_result
-                
-                # Salva resultado de cada agente
-                salvar_etapa(f"agente_{agent_name}", agent_result, categoria="analise_completa")
-                
-                logger.info(f"✅ Agente {agent_name} concluído")
-                
-            except Exception as e:
-                logger.error(f"❌ Erro no agente {agent_name}: {e}")
-                salvar_erro(f"agente_{agent_name}", e, contexto=data)
-                results['agents_results'][agent_name] = {
-                    'error': str(e),
-                    'status': 'failed'
-                }
+                future = executor.submit(execute_analysis, data, session_id)
+                future_to_agent[future] = agent_name
+            
+            for future in as_completed(future_to_agent):
+                agent_name = future_to_agent[future]
+                try:
+                    agent_result = future.result()
+                    agents_results[agent_name] = agent_result
+                    
+                    # Salva resultado de cada agente
+                    salvar_etapa(f"agente_{agent_name}", agent_result, categoria="analise_completa")
+                    
+                    logger.info(f"✅ Agente {agent_name} concluído")
+                    
+                except Exception as e:
+                    logger.error(f"❌ Erro no agente {agent_name}: {e}")
+                    salvar_erro(f"agente_{agent_name}", e, contexto=data)
+                    agents_results[agent_name] = {
+                        'error': str(e),
+                        'status': 'failed'
+                    }
+        
+        # Mantém a ordem de registro dos agentes no resultado
+        results['agents_results'] = {name: agents_results[name] for name in self.agent_names}
         
         # Consolida análise final
         results['consolidated_analysis'] = self._consolidate_psychological_analysis(results['agents_results'])
@@ -128,8 +147,8 @@ class PsychologicalAgentsSystem:
             'intensidade_emocional': 0,
             'cobertura_objecoes': 0,
             'arsenal_completo': False,
-            'agentes_executados': len([r for r in agents_results.values() if r.get('status') != 'failed']),
-            'total_agentes': len(self.agents)
+            'agentes_executados': sum(1 for r in agents_results.values() if r.get('status') != 'failed'),
+            'total_agentes': len(self.agent_names)
         }
         
         # Calcula densidade persuasiva
@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ARQV30 Enhanced v2.0 - Time Utilities
+Utilitários de timestamp para caminhos quentes
+"""
+
+import time
+from datetime import datetime
+
+# (segundo, iso) do último timestamp formatado
+_last_iso = (0, '')
+
+def now_iso() -> str:
+    """Retorna timestamp ISO local com resolução de segundos, formatado uma vez por segundo"""
+    global _last_iso
+
+    second = int(time.time())
+    cached_second, cached_iso = _last_iso
+    if second != cached_second:
+        cached_iso = datetime.fromtimestamp(second).isoformat()
+        _last_iso = (second, cached_iso)
+    return cached_iso